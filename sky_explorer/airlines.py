@@ -1,7 +1,21 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
 import pandas as pd
 
+CACHE_TTL = timedelta(hours=1)
+
+_cache: Optional[Tuple[datetime, pd.DataFrame]] = None
+
 
 def get_airlines() -> pd.DataFrame:
+    global _cache
+    if _cache is None or datetime.now() - _cache[0] > CACHE_TTL:
+        _cache = (datetime.now(), _load_airlines())
+    return _cache[1]
+
+
+def _load_airlines() -> pd.DataFrame:
     columns = ["id", "name", "alias", "iata", "icao", "callsign", "country", "active"]
 
     airlines = pd.read_csv(
@@ -10,10 +24,12 @@ def get_airlines() -> pd.DataFrame:
         header=None,
         index_col=["icao"],
         usecols=["icao", "name", "active"],
-        keep_default_na=False
-    ).replace("\\N", '')
+        keep_default_na=False,
+        na_values=["\\N"]
+    )
 
+    icao = airlines.index.fillna("")
     airlines = airlines[(airlines.active == "Y") &
-                        ~airlines.index.duplicated(keep='first') &
-                        airlines.index.str.match(r"\w{3}")]
+                        ~icao.duplicated(keep='first') &
+                        (icao.str.len() == 3) & icao.str.isalnum()]
     return airlines.drop(columns=["active"])
@@ -1,11 +1,16 @@
+import asyncio
+
 from sky_explorer.airlines import get_airlines
 from sky_explorer.opensky_api import OpenSkyApi
 
+_open_sky_api = OpenSkyApi()
+
 
-async def get_airplanes():
-    airplanes = await OpenSkyApi().get_airplanes()
+async def get_airplanes(bounds=None, api: OpenSkyApi = None):
+    airplanes, airlines = await asyncio.gather(
+        (api or _open_sky_api).get_airplanes(bounds=bounds),
+        asyncio.to_thread(get_airlines)
+    )
     if airplanes is not None:
-        airlines = get_airlines()
-        airlines_col = airplanes["callsign"].apply(lambda callsign: airlines.name.get(callsign[:3], ""))
-        airplanes.insert(1, 'airline', airlines_col)
+        airplanes["airline"] = airplanes["callsign"].str.slice(0, 3).map(airlines["name"]).fillna("")
     return airplanes
@@ -1,13 +1,29 @@
+from pathlib import Path
+
 import pandas as pd
 
+from sky_explorer.config import CONFIG
+
 
 def get_airports() -> pd.DataFrame:
+    cache_path = Path(CONFIG["data_dir"]) / "airports.parquet"
+    if cache_path.exists():
+        return pd.read_parquet(cache_path)
+
+    airports = _load_airports()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    airports.to_parquet(cache_path)
+    return airports
+
+
+def _load_airports() -> pd.DataFrame:
     columns = ["id", "name", "city", "country", "iata", "icao", "latitude", "longitude", "altitude",
                "timezone", "daylight_savings_time", "timezone_db", "type", "source"]
     use_columns = ["name", "city", "country", "icao", "latitude", "longitude", "altitude"]
 
     airports = pd.read_csv(
         "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat",
-        names=columns, header=None, index_col=["icao"], usecols=use_columns
+        names=columns, header=None, index_col=["icao"], usecols=use_columns,
+        na_values=["\\N"], dtype={"latitude": "float32", "longitude": "float32", "altitude": "int32"}
     )
-    return airports.replace("\\N", '').astype({"latitude": float, "longitude": float, "altitude": int})
+    return airports.fillna({"name": "", "city": "", "country": ""}).astype({"country": "category"})
@@ -2,10 +2,15 @@ from typing import Any
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 def load_yaml(filename: str) -> Any:
     with open(filename, "r") as file:
-        return yaml.safe_load(file)
+        return yaml.load(file, Loader=SafeLoader)
 
 
 CONFIG = load_yaml("config.yaml")
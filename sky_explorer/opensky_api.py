@@ -1,13 +1,52 @@
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import wraps
+from threading import Lock
 from typing import Optional, Tuple, Sequence, Any, Mapping
 
 import aiohttp
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 LOGGER = logging.getLogger('opensky_api')
 
+_AIO_TIMEOUT = aiohttp.ClientTimeout(total=15, sock_connect=5, sock_read=10)
+
+
+def _ttl_cache(seconds: int, maxsize: int = 256):
+    """Memoize a method's non-None results per instance and argument tuple
+    for `seconds`, dropping expired entries and evicting the least recently
+    used ones beyond `maxsize`."""
+    def decorator(func):
+        lock = Lock()
+        ttl = timedelta(seconds=seconds)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            cache = self.__dict__.setdefault(f"_{func.__name__}_cache", OrderedDict())
+            with lock:
+                if (hit := cache.get(key)) and datetime.now() - hit[0] < ttl:
+                    cache.move_to_end(key)
+                    return hit[1]
+            result = func(self, *args, **kwargs)
+            if result is not None:
+                with lock:
+                    now = datetime.now()
+                    for stale in [k for k, (cached_at, _) in cache.items() if now - cached_at >= ttl]:
+                        del cache[stale]
+                    cache[key] = (now, result)
+                    cache.move_to_end(key)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return result
+        return wrapper
+    return decorator
+
 
 class OpenSkyApi:
     """Access to OpenSky REST API, based on packages `opensky_api` and `traffic`.
@@ -18,35 +57,25 @@ class OpenSkyApi:
     BASE_URL = "https://opensky-network.org/api"
     TIME_DIFF_NO_AUTH = 10
     TIME_DIFF_AUTH = 5
+    RESPONSE_CACHE_SIZE = 64
 
-    STATE_COLUMNS = {
-        "icao24": str,
-        "callsign": lambda x: str(x).strip(),
-        "origin_country": str,
-        "time_position": lambda x: datetime.fromtimestamp(x) if x is not None
-            else datetime.now() - timedelta(seconds=15),
-        "last_contact": None,
-        "longitude": lambda x: float(x) if x is not None else None,
-        "latitude": lambda x: float(x) if x is not None else None,
-        "baro_altitude": lambda x: float(x) if x is not None else 0,
-        "on_ground": None,
-        "velocity": lambda x: float(x) if x is not None else 0,
-        "azimuth": lambda x: float(x) if x is not None else 0,
-        "vertical_rate": None,
-        "sensors": None,
-        "geo_altitude": None,
-        "squawk": None,
-        "spi": None,
-        "position_source": None,
-        "_": None
-    }
+    STATE_COLUMNS = (
+        "icao24", "callsign", "origin_country", "time_position", "last_contact",
+        "longitude", "latitude", "baro_altitude", "on_ground", "velocity",
+        "azimuth", "vertical_rate", "sensors", "geo_altitude", "squawk",
+        "spi", "position_source", "category"
+    )
+    STATE_COLUMNS_USED = (
+        "icao24", "callsign", "origin_country", "time_position",
+        "longitude", "latitude", "baro_altitude", "velocity", "azimuth"
+    )
     AIRCRAFT_COLUMNS = {
-        "icao24": ("icao24", str),
-        "callsign": ("callsign", lambda x: str(x).strip()),
-        "firstSeen": ("first_seen", lambda x: datetime.fromtimestamp(x)),
-        "lastSeen": ("last_seen", lambda x: datetime.fromtimestamp(x)),
-        "estDepartureAirport": ("departure_airport", str),
-        "estArrivalAirport": ("arrival_airport", str)
+        "icao24": "icao24",
+        "callsign": "callsign",
+        "firstSeen": "first_seen",
+        "lastSeen": "last_seen",
+        "estDepartureAirport": "departure_airport",
+        "estArrivalAirport": "arrival_airport"
     }
 
     def __init__(
@@ -56,28 +85,71 @@ class OpenSkyApi:
     ) -> None:
         self._auth = (username, password) if username is not None else ()
         self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        ))
+        self._response_cache = OrderedDict()
 
     def _get_json(self, url_suffix: str, params: Mapping[str, str] = None):
+        cache_key = (url_suffix, tuple(sorted(params.items())) if params else None)
+        etag, last_modified, cached = self._response_cache.get(cache_key, (None, None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
         try:
-            response = requests.get(f"{self.BASE_URL}{url_suffix}", auth=self._auth, params=params, timeout=15)
+            response = self._session.get(f"{self.BASE_URL}{url_suffix}", auth=self._auth, params=params,
+                                         headers=headers or None, timeout=15)
             if response.status_code == 200:
-                return response.json()
+                json = orjson.loads(response.content)
+                self._store_response(cache_key, response.headers, json)
+                return json
+            elif response.status_code == 304:
+                return cached
             else:
                 LOGGER.debug(f"Response not OK. Status {response.status_code} - {response.reason}")
         except Exception as error:
             LOGGER.debug(f"Request failed: {str(error)}")
         return None
 
+    def _store_response(self, cache_key, headers: Mapping[str, str], json) -> None:
+        """Remember a response's validators and payload for conditional
+        requests, keeping only the most recently used entries. Responses
+        without any validator can never be revalidated with a 304, so
+        caching their payload would only pin dead memory."""
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            self._response_cache.pop(cache_key, None)
+            return
+        self._response_cache[cache_key] = (etag, last_modified, json)
+        self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
     async def _get_json_async(self, url_suffix: str, params: Mapping[str, str] = None):
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(f"{self.BASE_URL}{url_suffix}", params=params, timeout=15)
+        cache_key = (url_suffix, tuple(sorted(params.items())) if params else None)
+        etag, last_modified, cached = self._response_cache.get(cache_key, (None, None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            async with aiohttp.ClientSession(timeout=_AIO_TIMEOUT) as session:
+                response = await session.get(f"{self.BASE_URL}{url_suffix}", params=params,
+                                             headers=headers or None)
                 if response.status == 200:
-                    return await response.json()
+                    json = orjson.loads(await response.read())
+                    self._store_response(cache_key, response.headers, json)
+                    return json
+                elif response.status == 304:
+                    return cached
                 else:
                     LOGGER.debug(f"Response not OK. Status {response.status} - {response.reason}")
-            except Exception as error:
-                LOGGER.debug(f"Request failed: {str(error)}")
+        except Exception as error:
+            LOGGER.debug(f"Request failed: {str(error)}")
         return None
 
     async def get_airplanes(
@@ -120,8 +192,7 @@ class OpenSkyApi:
             params.update({"lamin": bounds[0], "lamax": bounds[1], "lomin": bounds[2], "lomax": bounds[3]})
 
         if json := await self._get_json_async("/states/all", params=params):
-            data = [self._parse_state(x) for x in json["states"]]
-            return pd.DataFrame(data).set_index('icao24')
+            return self._parse_states(json["states"])
         return None
 
     def get_tracks(
@@ -157,6 +228,7 @@ class OpenSkyApi:
         """
         raise NotImplementedError
 
+    @_ttl_cache(120)
     def get_flights(
             self,
             begin: Optional[datetime] = None,
@@ -173,13 +245,10 @@ class OpenSkyApi:
         """
         if end - begin > timedelta(hours=2):
             raise ValueError("An interval of more than 2 hours not allowed")
-        params = {
-            "begin": str(int((begin or datetime(*datetime.utcnow().timetuple()[:3]) - timedelta(days=1)).timestamp())),
-            "end": str(int((end or datetime(*datetime.utcnow().timetuple()[:3])).timestamp()))
-        }
+        begin_ts, end_ts = self._time_window(begin, end, default_days_back=1, whole_days=True)
+        params = {"begin": str(begin_ts), "end": str(end_ts)}
         if json := self._get_json("/flights/all", params=params):
-            data = sorted((self._parse_aircraft(x) for x in json), key=lambda x: x["last_seen"])
-            return pd.DataFrame(data).set_index('icao24')
+            return self._parse_aircrafts(json)
         return None
 
     def get_aircraft(
@@ -197,14 +266,10 @@ class OpenSkyApi:
         [begin, end]. If no flights are found for the given period, HTTP stats
         404 - Not found is returned with an empty response body.
         """
-        params = {
-            "icao24": icao24,
-            "begin": int((begin or datetime(*datetime.utcnow().timetuple()[:3]) - timedelta(days=1)).timestamp()),
-            "end": int((end or datetime(*datetime.utcnow().timetuple()[:3])).timestamp())
-        }
+        begin_ts, end_ts = self._time_window(begin, end, default_days_back=1, whole_days=True)
+        params = {"icao24": icao24, "begin": begin_ts, "end": end_ts}
         if json := self._get_json("/flights/aircraft", params=params):
-            data = sorted((self._parse_aircraft(x) for x in json), key=lambda x: x["last_seen"])
-            return pd.DataFrame(data).set_index('icao24')
+            return self._parse_aircrafts(json)
         return None
 
     def get_global_coverage(self) -> Optional[Sequence[Tuple[int, int, int]]]:
@@ -212,6 +277,7 @@ class OpenSkyApi:
             return json
         return None
 
+    @_ttl_cache(300)
     def get_arrival(
             self,
             airport: str,
@@ -228,16 +294,13 @@ class OpenSkyApi:
         interval [begin, end]. If no flights are found for the given period,
         HTTP stats 404 - Not found is returned with an empty response body.
         """
-        params = {
-            "airport": airport,
-            "begin": int((begin or datetime.utcnow() - timedelta(days=2)).timestamp()),
-            "end": int((end or datetime.utcnow()).timestamp())
-        }
+        begin_ts, end_ts = self._time_window(begin, end, default_days_back=2)
+        params = {"airport": airport, "begin": begin_ts, "end": end_ts}
         if json := self._get_json("/flights/arrival", params=params):
-            data = sorted((self._parse_aircraft(x) for x in json), key=lambda x: x["last_seen"])
-            return pd.DataFrame(data).set_index('icao24')
+            return self._parse_aircrafts(json)
         return None
 
+    @_ttl_cache(300)
     def get_departure(
             self,
             airport: str,
@@ -255,16 +318,27 @@ class OpenSkyApi:
         period, HTTP stats 404 - Not found is returned with an empty response
         body.
         """
-        params = {
-            "airport": airport,
-            "begin": int((begin or datetime.utcnow() - timedelta(days=1)).timestamp()),
-            "end": int((end or datetime.utcnow()).timestamp())
-        }
+        begin_ts, end_ts = self._time_window(begin, end, default_days_back=1)
+        params = {"airport": airport, "begin": begin_ts, "end": end_ts}
         if json := self._get_json("/flights/departure", params=params):
-            data = sorted((self._parse_aircraft(x) for x in json), key=lambda x: x["last_seen"])
-            return pd.DataFrame(data).set_index('icao24')
+            return self._parse_aircrafts(json)
         return None
 
+    @staticmethod
+    def _time_window(
+            begin: Optional[datetime],
+            end: Optional[datetime],
+            default_days_back: int,
+            whole_days: bool = False
+    ) -> Tuple[int, int]:
+        """Epoch-second (begin, end) pair, defaulting to a window ending now
+        (or at today's midnight when `whole_days` is set)."""
+        now = datetime.utcnow()
+        if whole_days:
+            now = datetime(now.year, now.month, now.day)
+        return (int((begin or now - timedelta(days=default_days_back)).timestamp()),
+                int((end or now).timestamp()))
+
     @staticmethod
     def _check_lat(lat):
         if lat < -90 or lat > 90:
@@ -275,9 +349,31 @@ class OpenSkyApi:
         if lon < -180 or lon > 180:
             raise ValueError("Invalid longitude {:f}! Must be in [-180, 180]".format(lon))
 
-    def _parse_state(self, state: Sequence[Any]):
-        return {name: func(value) for value, (name, func) in zip(state, self.STATE_COLUMNS.items()) if func}
+    def _parse_states(self, states: Optional[Sequence[Sequence[Any]]]) -> pd.DataFrame:
+        if states:
+            df = pd.DataFrame([state[:len(self.STATE_COLUMNS)] for state in states])
+            df.columns = self.STATE_COLUMNS[:df.shape[1]]
+        else:
+            # OpenSky returns {"states": null} for a region without aircraft
+            df = pd.DataFrame(columns=list(self.STATE_COLUMNS))
+        df = df[list(self.STATE_COLUMNS_USED)]
+        df = df.dropna(subset=["longitude", "latitude"])
+        df["callsign"] = df["callsign"].fillna("").astype(str).str.strip()
+        df["origin_country"] = df["origin_country"].astype("category")
+        df["time_position"] = pd.to_datetime(df["time_position"], unit="s") \
+            .fillna(datetime.utcnow() - timedelta(seconds=15))
+        numeric_columns = ["longitude", "latitude", "baro_altitude", "velocity", "azimuth"]
+        df[numeric_columns] = df[numeric_columns].astype("float32")
+        df = df.fillna({"baro_altitude": 0, "velocity": 0, "azimuth": 0})
+        return df.set_index("icao24")
 
-    def _parse_aircraft(self, aircraft: Mapping[str, Any]):
-        return {self.AIRCRAFT_COLUMNS[key][0]: self.AIRCRAFT_COLUMNS[key][1](value)
-                for key, value in aircraft.items() if key in self.AIRCRAFT_COLUMNS}
+    def _parse_aircrafts(self, aircrafts: Sequence[Mapping[str, Any]]) -> pd.DataFrame:
+        df = pd.DataFrame(aircrafts)
+        df = df[[key for key in self.AIRCRAFT_COLUMNS if key in df.columns]] \
+            .rename(columns=self.AIRCRAFT_COLUMNS)
+        df["callsign"] = df["callsign"].fillna("").astype(str).str.strip()
+        for column in ("departure_airport", "arrival_airport"):
+            df[column] = df[column].fillna("").astype(str)
+        for column in ("first_seen", "last_seen"):
+            df[column] = pd.to_datetime(df[column], unit="s")
+        return df.sort_values("last_seen").set_index("icao24")
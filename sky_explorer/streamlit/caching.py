@@ -1,7 +1,7 @@
 import streamlit as st
 
 
-@st.cache(allow_output_mutation=True, show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def _get_global_cache() -> dict:
     return {}
 
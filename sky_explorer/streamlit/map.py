@@ -17,10 +17,12 @@ class MapStyle(Enum):
 class MapRenderer:
     def __init__(self):
         self._view_state = pdk.ViewState(latitude=0, longitude=0, zoom=1)
+        self._last_airplanes = None
+        self._last_airports = None
         self._airplane_layer = pdk.Layer(
             type="IconLayer",
             data=None,
-            get_icon="icon_data",
+            get_icon=CONFIG["map"]["airplane"]["icon"],
             get_size=1,
             size_scale=25,
             get_angle="angle",
@@ -30,7 +32,7 @@ class MapRenderer:
         self._airport_layer = pdk.Layer(
             type="IconLayer",
             data=None,
-            get_icon="icon_data",
+            get_icon=CONFIG["map"]["airport"]["icon"],
             get_size=1,
             size_scale=25,
             get_position=["longitude", "latitude"],
@@ -42,27 +44,25 @@ class MapRenderer:
             initial_view_state=self._view_state,
             tooltip={"text": "{tooltip}"}
         )
-        self._map = None
 
-    def draw(self, map_style: MapStyle, airports: pd.DataFrame):
+    def draw(self, map_style: MapStyle, airports: pd.DataFrame, airplanes: pd.DataFrame):
         self._deck.map_style = f"mapbox://styles/mapbox/{map_style.value}"
         self._set_airports(airports)
-        self._map = st.pydeck_chart(self._deck)
-
-    def update(self, airplanes: pd.DataFrame):
         self._set_airplanes(airplanes)
-        self._deck.update()
-        self._map.pydeck_chart(self._deck)
+        st.pydeck_chart(self._deck)
 
     def _set_airplanes(self, airplanes: pd.DataFrame):
-        icon_data = CONFIG["map"]["airplane"]["icon"]
-        df = airplanes.assign(icon_data=[icon_data] * len(airplanes.index))
-        df["angle"] = (360 - df["azimuth"])
-        df = df.rename(columns={"callsign": "tooltip"})
-        self._airplane_layer.data = df[["longitude", "latitude", "angle", "icon_data", "tooltip"]]
+        if airplanes is self._last_airplanes:
+            return
+        self._last_airplanes = airplanes
+        df = airplanes[["longitude", "latitude", "angle"]].copy()
+        df["tooltip"] = airplanes["callsign"].to_numpy()
+        self._airplane_layer.data = df
 
     def _set_airports(self, airports: pd.DataFrame):
-        icon_data = CONFIG["map"]["airport"]["icon"]
-        df = airports.assign(icon_data=[icon_data] * len(airports.index))
-        df['tooltip'] = df.index
-        self._airport_layer.data = df[["longitude", "latitude", "icon_data", "tooltip"]]
+        if airports is self._last_airports:
+            return
+        self._last_airports = airports
+        df = airports[["longitude", "latitude"]].copy()
+        df["tooltip"] = airports.index
+        self._airport_layer.data = df
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Set, Tuple
+from typing import Tuple
 
 FloatRange = Tuple[float, float]
 
@@ -9,7 +9,7 @@ class AirplaneFilter:
     limit: int = None
     callsign: str = None
     airline: str = None
-    origin_countries: Set = None
+    origin_countries: Tuple[str, ...] = None
     longitude: FloatRange = None
     latitude: FloatRange = None
     altitude: FloatRange = None
@@ -21,7 +21,7 @@ class AirplaneFilter:
 class AirportFilter:
     limit: int = None
     name: str = None
-    countries: Set = None
+    countries: Tuple[str, ...] = None
     longitude: FloatRange = None
     latitude: FloatRange = None
     altitude: FloatRange = None
@@ -1,33 +1,38 @@
 import asyncio
-from datetime import datetime, timedelta
+from dataclasses import astuple
+from datetime import datetime
 from operator import attrgetter
+from time import monotonic
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from sky_explorer.config import CONFIG
 from sky_explorer.streamlit.map import MapRenderer, MapStyle
 from sky_explorer.streamlit.models import AirplaneFilter, AirportFilter
-from sky_explorer.streamlit.utils import get_airplanes, get_airports
+from sky_explorer.streamlit.utils import get_airplanes, get_airports, get_city_latlons, get_sorted_unique
 from sky_explorer.utils import sort_by_location, predict_airplanes
 
 
 class OverviewDashboard:
     def __init__(self):
         self._airplanes = None
+        self._airports = None
         self._do_animate = False
         self._latlon_of_interest = None
         self._map_renderer = MapRenderer()
-        self._st_airplanes = None
-        self._st_airports = None
+        self._map_style = MapStyle.Satellite
         self._airplane_filter = AirplaneFilter()
         self._airport_filter = AirportFilter()
+        self._last_data_update = float("-inf")
 
     def __call__(self):
         asyncio.run(self._run())
 
     async def _run(self):
-        airplanes = await get_airplanes()
+        airplanes = await get_airplanes(bounds=self._get_bounds_of_interest())
         airports = get_airports()
 
         with st.sidebar:
@@ -38,16 +43,15 @@ class OverviewDashboard:
                     key="do_animate"
                 )
 
-                cities_of_interest = list(airports["city"].sort_values().unique())
+                cities_of_interest = get_sorted_unique(airports["city"])
                 city_of_interest = st.selectbox(
                     label="City of interest", key="place_of_interest",
                     options=cities_of_interest,
                     index=cities_of_interest.index("Amsterdam")
                 )
-                airport_of_interest = airports[airports.city == city_of_interest]
-                self._latlon_of_interest = tuple(airport_of_interest[["latitude", "longitude"]].values[0])
+                self._latlon_of_interest = get_city_latlons(airports)[city_of_interest]
 
-                map_style = st.selectbox(
+                self._map_style = st.selectbox(
                     label="Map style",
                     options=MapStyle,
                     format_func=attrgetter('name'),
@@ -67,10 +71,13 @@ class OverviewDashboard:
                     label="Airline", key="airplane_airline",
                     value=""
                 )
-                self._airplane_filter.origin_countries = set(st.multiselect(
+                origin_countries = get_sorted_unique(airplanes["origin_country"])
+                selected_countries = tuple(sorted(st.multiselect(
                     label="Country of origin", key="airplane_origin_countries",
-                    options=airplanes["origin_country"].sort_values().unique(),
-                ))
+                    options=origin_countries,
+                )))
+                self._airplane_filter.origin_countries = \
+                    None if len(selected_countries) == len(origin_countries) else selected_countries
                 self._airplane_filter.longitude = st.slider(
                     label="Longitude (decimal degrees)", key="airplane_longitude",
                     min_value=-180, max_value=180, value=(-180, 180), step=1,
@@ -98,10 +105,13 @@ class OverviewDashboard:
                     min_value=0, max_value=10000, value=10000, step=1,
                 )
                 self._airport_filter.name = st.text_input(label="Name", value="", key="airport_name").lower()
-                self._airport_filter.countries = set(st.multiselect(
+                countries = get_sorted_unique(airports["country"])
+                selected_airport_countries = tuple(sorted(st.multiselect(
                     label="Country", key="airport_countries",
-                    options=airports["country"].sort_values().unique()
-                ))
+                    options=countries
+                )))
+                self._airport_filter.countries = \
+                    None if len(selected_airport_countries) == len(countries) else selected_airport_countries
                 self._airport_filter.longitude = st.slider(
                     label="Longitude (decimal degrees)", key="airport_longitude",
                     min_value=-180, max_value=180, value=(-180, 180), step=1,
@@ -116,70 +126,113 @@ class OverviewDashboard:
                 )
 
         self._airplanes = self._filter_airplanes(airplanes)
-        airports = self._filter_airports(airports)
-
-        self.st_title = st.title("Overview")
-        self._map_renderer.draw(map_style, airports)
-        st.subheader("Airplanes")
-        self._st_airplanes = st.empty()
-        st.subheader("Airports")
-        st.dataframe(airports)
+        self._airports = self._filter_airports(airports)
+        self._last_data_update = monotonic()
 
         if self._do_animate:
-            await self._update_dashboard_continuously()
+            st.fragment(self._render_airplanes, run_every=CONFIG["map"]["animation_delay_ms"] / 1000)()
         else:
-            self._update_airplanes()
-
-    def _update_airplanes(self):
-        airplanes = predict_airplanes(self._airplanes)
-        self._map_renderer.update(airplanes)
-        self._st_airplanes.dataframe(airplanes.drop(columns="time_position"))
-        self.st_title.title(f"Overview ({datetime.now().strftime('%Y/%m/%d %H:%M:%S')})")
-
-    async def _update_airplane_data(self):
-        airplanes = await get_airplanes(use_session_state=False)
-        self._airplanes = self._filter_airplanes(airplanes)
-
-    async def _update_dashboard_continuously(self):
-        delay = CONFIG["map"]["animation_delay_ms"] / 1000
-        last_update = datetime.min
-        loop = asyncio.get_event_loop()
-
-        while True:
-            start = datetime.now()
+            self._render_airplanes()
 
-            if datetime.now() - last_update > timedelta(seconds=CONFIG["data_delay"]):
-                last_update = datetime.now()
-                loop.create_task(self._update_airplane_data())
+        with st.expander("Airports", expanded=False):
+            st.dataframe(self._airports[CONFIG["display_columns"]["airports"]], use_container_width=True)
 
-            self._update_airplanes()
+    def _render_airplanes(self):
+        """Draws the title, map and airplane table; when animating this runs
+        as a fragment every animation tick without rerunning the full page."""
+        if self._do_animate and monotonic() - self._last_data_update > CONFIG["data_delay"]:
+            self._last_data_update = monotonic()
+            airplanes = asyncio.run(get_airplanes(use_session_state=False, bounds=self._get_bounds_of_interest()))
+            self._airplanes = self._filter_airplanes(airplanes)
 
-            elapsed = (datetime.now() - start).microseconds / 1000000
-            await asyncio.sleep(max(0.01, delay - elapsed))
+        airplanes = predict_airplanes(self._airplanes)
+        st.title(f"Overview ({datetime.now().strftime('%Y/%m/%d %H:%M:%S')})")
+        self._map_renderer.draw(self._map_style, self._airports, airplanes)
+        st.subheader("Airplanes")
+        st.dataframe(airplanes[CONFIG["display_columns"]["airplanes"]])
+
+    @staticmethod
+    def _get_bounds_of_interest():
+        """Bounding box for the OpenSky query, taken from the lat/lon filter
+        sliders of the previous rerun; None when they span the whole globe."""
+        latitude = st.session_state.get("airplane_latitude", (-90, 90))
+        longitude = st.session_state.get("airplane_longitude", (-180, 180))
+        if latitude == (-90, 90) and longitude == (-180, 180):
+            return None
+        return latitude[0], latitude[1], longitude[0], longitude[1]
+
+    @staticmethod
+    def _range_mask(df: pd.DataFrame, ranges) -> Optional[np.ndarray]:
+        """Single boolean ndarray for a sequence of (column, (low, high),
+        (full_low, full_high)) range predicates, composed in place without
+        intermediate Series. Predicates left at the full span of their
+        slider are skipped; None means no predicate applied at all."""
+        mask = None
+        for column, (low, high), (full_low, full_high) in ranges:
+            if low <= full_low and high >= full_high:
+                continue
+            values = df[column].to_numpy()
+            predicate = (values >= low) & (values <= high)
+            mask = predicate if mask is None else mask & predicate
+        return mask
+
+    @staticmethod
+    def _text_mask(series: pd.Series, needle: str, prefix: bool = False) -> pd.Series:
+        """Match mask for a user-typed needle against a pre-lowercased
+        column: a literal (non-regex) substring scan, or the cheaper prefix
+        match when `prefix` is set and the input is plain alphanumeric (the
+        callsign case, where users type the leading characters)."""
+        needle = needle.lower()
+        if prefix and needle.isalnum():
+            return series.str.startswith(needle, na=False)
+        return series.str.contains(needle, regex=False, na=False)
 
     def _filter_airplanes(self, airplanes: pd.DataFrame) -> pd.DataFrame:
-        mask = (airplanes['longitude'].between(*self._airplane_filter.longitude)) & \
-               (airplanes['latitude'].between(*self._airplane_filter.latitude)) & \
-               (airplanes['baro_altitude'].between(*self._airplane_filter.altitude)) & \
-               (airplanes['velocity'].between(*self._airplane_filter.velocity)) & \
-               (airplanes['azimuth'].between(*self._airplane_filter.azimuth))
-        if self._airplane_filter.callsign:
-            mask &= airplanes['callsign'].str.contains(self._airplane_filter.callsign, case=False)
-        if self._airplane_filter.airline:
-            mask &= airplanes['airline'].str.contains(self._airplane_filter.airline, case=False)
-        if self._airplane_filter.origin_countries:
-            mask &= airplanes['origin_country'].isin(self._airplane_filter.origin_countries)
-
-        return sort_by_location(airplanes[mask], self._latlon_of_interest).head(self._airplane_filter.limit)
+        airplane_filter = self._airplane_filter
+        cache_key = (astuple(airplane_filter), self._latlon_of_interest)
+        cached = st.session_state.get("filtered_airplanes")
+        if cached is not None and cached[0] is airplanes and cached[1] == cache_key:
+            return cached[2]
+        source = airplanes
+
+        mask = self._range_mask(airplanes, (
+            ("longitude", airplane_filter.longitude, (-180, 180)),
+            ("latitude", airplane_filter.latitude, (-90, 90)),
+            ("baro_altitude", airplane_filter.altitude, (0, 30000)),
+            ("velocity", airplane_filter.velocity, (0, 500)),
+            ("azimuth", airplane_filter.azimuth, (0, 360)),
+        ))
+        if mask is not None:
+            airplanes = airplanes.iloc[np.flatnonzero(mask)]
+        if airplane_filter.callsign:
+            airplanes = airplanes[self._text_mask(airplanes['callsign_lower'], airplane_filter.callsign,
+                                                  prefix=True)]
+        if airplane_filter.airline:
+            airplanes = airplanes[self._text_mask(airplanes['airline_lower'], airplane_filter.airline)]
+        if airplane_filter.origin_countries:
+            airplanes = airplanes[airplanes['origin_country'].isin(airplane_filter.origin_countries)]
+
+        filtered = sort_by_location(airplanes, self._latlon_of_interest, airplane_filter.limit)
+        st.session_state["filtered_airplanes"] = (source, cache_key, filtered)
+        return filtered
 
     def _filter_airports(self, airports: pd.DataFrame) -> pd.DataFrame:
-        mask = (airports['longitude'].between(*self._airport_filter.longitude)) & \
-               (airports['latitude'].between(*self._airport_filter.latitude)) & \
-               (airports['altitude'].between(*self._airport_filter.altitude))
-        if self._airport_filter.name:
-            mask &= airports['name'].str.normalize('NFKD').str.encode('ascii', errors='ignore').str \
-                .decode('utf-8').str.contains(self._airport_filter.name, case=False)
-        if self._airport_filter.countries:
-            mask &= airports['country'].isin(self._airport_filter.countries)
-
-        return sort_by_location(airports[mask], self._latlon_of_interest).head(self._airport_filter.limit)
+        return _filter_airports(airports, self._airport_filter, self._latlon_of_interest)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _filter_airports(_airports: pd.DataFrame, airport_filter: AirportFilter, latlon_of_interest) -> pd.DataFrame:
+    """Filtered and sorted airport table, memoized on the filter settings;
+    the airport data itself is static so it is excluded from the cache key."""
+    mask = OverviewDashboard._range_mask(_airports, (
+        ("longitude", airport_filter.longitude, (-180, 180)),
+        ("latitude", airport_filter.latitude, (-90, 90)),
+        ("altitude", airport_filter.altitude, (-100, 10000)),
+    ))
+    airports = _airports if mask is None else _airports.iloc[np.flatnonzero(mask)]
+    if airport_filter.name:
+        airports = airports[OverviewDashboard._text_mask(airports['name_ascii'], airport_filter.name)]
+    if airport_filter.countries:
+        airports = airports[airports['country'].isin(airport_filter.countries)]
+
+    return sort_by_location(airports, latlon_of_interest, airport_filter.limit)
@@ -17,19 +17,25 @@ class StatisticsDashboard:
 
     async def _run(self):
         st.title("Statistics")
+        airplane_report, airport_report = await asyncio.gather(
+            asyncio.to_thread(get_airplane_report),
+            asyncio.to_thread(get_airport_report)
+        )
         st.subheader("Airplanes")
-        st_profile_report(await self.get_airplane_report())
+        st_profile_report(airplane_report)
         st.subheader("Airports")
-        st_profile_report(self.get_airport_report())
-
-    async def get_airplane_report(self):
-        if "airplane_report" not in st.session_state:
-            airplanes = await get_airplanes()
-            st.session_state["airplane_report"] = ProfileReport(airplanes)
-        return st.session_state["airplane_report"]
-
-    def get_airport_report(self):
-        if "airport_report" not in st.session_state:
-            airports = get_airports()
-            st.session_state["airport_report"] = ProfileReport(airports)
-        return st.session_state["airport_report"]
+        st_profile_report(airport_report)
+
+
+@st.cache_resource(show_spinner=False, ttl=3600)
+def get_airplane_report() -> ProfileReport:
+    """Profile of the current airplane states, shared across sessions so the
+    expensive report is built once per hour instead of once per browser tab."""
+    airplanes = asyncio.run(get_airplanes())
+    return ProfileReport(airplanes)
+
+
+@st.cache_resource(show_spinner=False, ttl=3600)
+def get_airport_report() -> ProfileReport:
+    """Profile of the airport table, shared across sessions."""
+    return ProfileReport(get_airports())
@@ -1,5 +1,6 @@
-from datetime import datetime
+from time import monotonic
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from PIL import Image
@@ -8,9 +9,15 @@ import sky_explorer.airlines
 import sky_explorer.airplanes
 import sky_explorer.airports
 from sky_explorer.config import CONFIG
+from sky_explorer.opensky_api import OpenSkyApi
 from sky_explorer.streamlit.caching import GLOBAL_CACHE
 
 
+@st.cache_resource(show_spinner=False)
+def get_open_sky_api() -> OpenSkyApi:
+    return OpenSkyApi()
+
+
 def init_page_layout():
     st.set_page_config(
         page_title="Sky Explorer",
@@ -29,24 +36,32 @@ def init_page_layout():
     )
 
 
-async def _get_airplanes() -> pd.DataFrame:
-    if (datetime.now() - GLOBAL_CACHE.get("airplanes_last_query_time", datetime.min)).seconds > CONFIG["data_delay"]:
-        airplanes = await sky_explorer.airplanes.get_airplanes()
+async def _get_airplanes(bounds=None) -> pd.DataFrame:
+    if monotonic() - GLOBAL_CACHE.get("airplanes_last_query_time", float("-inf")) > CONFIG["data_delay"] \
+            or bounds != GLOBAL_CACHE.get("airplanes_bounds"):
+        airplanes = await sky_explorer.airplanes.get_airplanes(bounds=bounds, api=get_open_sky_api())
         if airplanes is not None:
-            GLOBAL_CACHE["airplanes_last_query_time"] = datetime.now()
+            airplanes["angle"] = np.float32(360) - airplanes["azimuth"].to_numpy(dtype=np.float32)
+            airplanes["callsign_lower"] = airplanes["callsign"].str.lower()
+            airplanes["airline_lower"] = airplanes["airline"].str.lower()
+            GLOBAL_CACHE["airplanes_last_query_time"] = monotonic()
             GLOBAL_CACHE["airplanes"] = airplanes
+            GLOBAL_CACHE["airplanes_bounds"] = bounds
     return GLOBAL_CACHE["airplanes"].copy()
 
 
-async def get_airplanes(use_session_state: bool = True) -> pd.DataFrame:
+async def get_airplanes(use_session_state: bool = True, bounds=None) -> pd.DataFrame:
     if "airplanes" not in st.session_state or not use_session_state:
-        st.session_state["airplanes"] = await _get_airplanes()
+        st.session_state["airplanes"] = await _get_airplanes(bounds=bounds)
     return st.session_state["airplanes"]
 
 
 def get_airports() -> pd.DataFrame:
     if "airports" not in st.session_state:
-        st.session_state["airports"] = sky_explorer.airports.get_airports()
+        airports = sky_explorer.airports.get_airports()
+        airports["name_ascii"] = airports["name"].str.normalize("NFKD") \
+            .str.encode("ascii", errors="ignore").str.decode("utf-8").str.lower()
+        st.session_state["airports"] = airports
     return st.session_state["airports"]
 
 
@@ -54,3 +69,19 @@ def get_airlines() -> pd.DataFrame:
     if "airlines" not in st.session_state:
         st.session_state["airlines"] = sky_explorer.airlines.get_airlines()
     return st.session_state["airlines"]
+
+
+@st.cache_data(show_spinner=False)
+def get_city_latlons(_airports: pd.DataFrame) -> dict:
+    """City name to the (latitude, longitude) of its first airport, built
+    once so the place-of-interest lookup is a dict access instead of a
+    full-table scan on every rerun."""
+    first = _airports.drop_duplicates("city")
+    return dict(zip(first["city"], zip(first["latitude"], first["longitude"])))
+
+
+@st.cache_data(ttl=CONFIG["data_delay"], show_spinner=False)
+def get_sorted_unique(values: pd.Series) -> list:
+    """Sorted unique values of a column, memoized so widget option lists are
+    not re-sorted on every Streamlit rerun."""
+    return sorted(values.dropna().unique())
@@ -1,42 +1,55 @@
 from datetime import datetime
-from math import asin, atan2, pi, sin, cos
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
-from haversine import haversine
 
 EARTH_RADIUS = 6371
 
 
-def _euclidean_distance(data: np.array) -> float:
-    return haversine((data[0], data[1]), (data[2], data[3]))
+def _haversine_distances(latitudes: np.ndarray, longitudes: np.ndarray,
+                         latlon: Tuple[float, float]) -> np.ndarray:
+    """Great-circle distances in km from each (latitude, longitude) pair to
+    a single reference point, computed with whole-array NumPy ufuncs."""
+    lat = np.deg2rad(latitudes)
+    lon = np.deg2rad(longitudes)
+    ref_lat, ref_lon = np.deg2rad(latlon[0]), np.deg2rad(latlon[1])
+    chord = np.sin((ref_lat - lat) / 2) ** 2 \
+        + np.cos(lat) * np.cos(ref_lat) * np.sin((ref_lon - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(chord))
 
 
-def sort_by_location(df: pd.DataFrame, latlon: Tuple[float, float]) -> pd.DataFrame:
+def sort_by_location(df: pd.DataFrame, latlon: Tuple[float, float], limit: int = None) -> pd.DataFrame:
+    """Rows of `df` ordered by distance to `latlon`; with `limit` set, only
+    the `limit` nearest rows are selected (via argpartition) before sorting."""
     if len(df):
-        df = df.copy()
-        input_values = np.c_[df[["latitude", "longitude"]].values, np.full((len(df), 2), latlon)]
-        distances = np.apply_along_axis(_euclidean_distance, 1, input_values)
-        return df.assign(distance=distances).sort_values(by=["distance"]).drop(columns=["distance"])
+        distances = _haversine_distances(df["latitude"].to_numpy(dtype=np.float64),
+                                         df["longitude"].to_numpy(dtype=np.float64), latlon)
+        if limit is not None and limit < len(df):
+            nearest = np.argpartition(distances, limit)[:limit]
+            order = nearest[np.argsort(distances[nearest])]
+        else:
+            order = np.argsort(distances)
+        return df.iloc[order]
     return df
 
 
-def _predict_next_latlon(data: np.array) -> Tuple[float, float]:
-    lat, lon, bearing, velocity, time_position = data
-    delta_time = (datetime.now() - time_position).total_seconds()
-    distance = velocity * delta_time / 1000
-    lat2 = asin(sin(pi / 180 * lat) * cos(distance / EARTH_RADIUS) + cos(pi / 180 * lat)
-                * sin(distance / EARTH_RADIUS) * cos(pi / 180 * bearing))
-    lon2 = pi / 180 * lon + atan2(
-        sin(pi / 180 * bearing) * sin(distance / EARTH_RADIUS) * cos(pi / 180 * lat),
-        cos(distance / EARTH_RADIUS) - sin(pi / 180 * lat) * sin(lat2))
-    return 180 / pi * lat2, 180 / pi * lon2
-
-
 def predict_airplanes(airplanes: pd.DataFrame) -> pd.DataFrame:
+    """Airplanes with latitude/longitude advanced along their bearing by the
+    time elapsed since `time_position`, computed with whole-array NumPy ufuncs."""
     if len(airplanes):
-        airplanes = airplanes.copy()
-        input_values = airplanes[["latitude", "longitude", "azimuth", "velocity", "time_position"]].values
-        airplanes[["latitude", "longitude"]] = np.apply_along_axis(_predict_next_latlon, 1, input_values)
+        lat = np.deg2rad(airplanes["latitude"].to_numpy(dtype=np.float64))
+        lon = np.deg2rad(airplanes["longitude"].to_numpy(dtype=np.float64))
+        bearing = np.deg2rad(airplanes["azimuth"].to_numpy(dtype=np.float64))
+        velocity = airplanes["velocity"].to_numpy(dtype=np.float64)
+        delta_time = (datetime.utcnow() - airplanes["time_position"]).dt.total_seconds().to_numpy()
+        distance = velocity * delta_time / 1000 / EARTH_RADIUS
+
+        sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+        sin_distance, cos_distance = np.sin(distance), np.cos(distance)
+        lat2 = np.arcsin(sin_lat * cos_distance + cos_lat * sin_distance * np.cos(bearing))
+        lon2 = lon + np.arctan2(np.sin(bearing) * sin_distance * cos_lat,
+                                cos_distance - sin_lat * np.sin(lat2))
+        airplanes = airplanes.assign(latitude=np.rad2deg(lat2).astype(np.float32),
+                                     longitude=np.rad2deg(lon2).astype(np.float32))
     return airplanes